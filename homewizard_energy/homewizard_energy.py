@@ -2,12 +2,19 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-import string
-
-import async_timeout
-from aiohttp.client import ClientError, ClientResponseError, ClientSession
-from aiohttp.hdrs import METH_DELETE, METH_GET, METH_PUT
+from copy import deepcopy
+from functools import partial
+from typing import Any, Callable
+
+from aiohttp.client import (
+    ClientConnectionError,
+    ClientError,
+    ClientSession,
+    ClientTimeout,
+)
+from aiohttp.connector import TCPConnector
 
 from .const import SUPPORTED_API_VERSION
 from .errors import DisabledError, RequestError, UnsupportedError
@@ -17,6 +24,27 @@ from .models import Data, Decryption, Device, State, System
 _LOGGER = logging.getLogger(__name__)
 
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Connection errors are retried with an exponential backoff within the timeout
+_REQUEST_ATTEMPTS = 3
+_RETRY_DELAY = 0.1
+
+
+def _without_none(**kwargs: Any) -> dict[str, Any]:
+    """Return the keyword arguments that are not None."""
+    return {key: value for key, value in kwargs.items() if value is not None}
+
+
+def _is_hex(value: str) -> bool:
+    """Return if value only contains hexadecimal characters."""
+    try:
+        # bytes.fromhex skips whitespace, so compare the decoded length too
+        return len(bytes.fromhex(value)) * 2 == len(value)
+    except ValueError:
+        return False
+
+
 class HomeWizardEnergy:
     """Communicate with a HomeWizard Energy device."""
 
@@ -26,19 +54,39 @@ class HomeWizardEnergy:
 
     _features: Features | None = None
 
+    _cache_data: bool = False
+    _last_data_response: Any = None
+    _last_data: Data | None = None
+
     def __init__(
-        self, host: str, clientsession: ClientSession = None, timeout: int = 10
+        self,
+        host: str,
+        clientsession: ClientSession = None,
+        timeout: int = 10,
+        cache_data: bool = False,
     ):
         """Create a HomeWizard Energy object.
 
         Args:
             host: IP or URL for device.
-            clientsession: The clientsession.
+            clientsession: The clientsession. When polling multiple devices,
+                create one session and share it between all objects.
+            timeout: Request timeout in seconds. This bounds the total time of
+                a call, including retries after connection errors.
+            cache_data: Return the previous Data object from `data()` when the
+                device response did not change. The returned object is shared
+                between calls and should not be modified.
         """
 
         self._host = host
+        self._base_url = f"http://{host}"
         self._session = clientsession
         self._request_timeout = timeout
+        self._cache_data = cache_data
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._client_timeout = ClientTimeout(
+            total=timeout, connect=timeout / 2, sock_read=timeout
+        )
 
     @property
     def host(self) -> str:
@@ -51,8 +99,12 @@ class HomeWizardEnergy:
         return self._host
 
     async def features(self) -> Features:
-        """Create or return Features object."""
-        if self.features is None:
+        """Create or return Features object.
+
+        The object is created once from the device information and reused
+        for subsequent calls.
+        """
+        if self._features is None:
             await self.device()
 
         return self._features
@@ -62,27 +114,82 @@ class HomeWizardEnergy:
         response = await self.request("api")
         device = Device.from_dict(response)
 
-        self._features = Features(device.product_type, device.firmware_version)
-
         if device.api_version != SUPPORTED_API_VERSION:
             raise UnsupportedError(
                 f"Unsupported API version, expected version '{SUPPORTED_API_VERSION}'"
             )
 
+        self._features = Features(device.product_type, device.firmware_version)
+
         return device
 
+    async def _request_with_features(
+        self, path: str, supported: Callable[[Features], bool]
+    ) -> Any:
+        """Request a feature gated endpoint.
+
+        When the features are not known yet, the device information is
+        requested concurrently with the endpoint to save a round-trip.
+
+        Args:
+            path: The API endpoint to request.
+            supported: Check if the endpoint is supported.
+
+        Returns:
+            The response, or None when the endpoint is not supported.
+        """
+        if self._features is not None:
+            if not supported(self._features):
+                return None
+            return await self.request(path)
+
+        features, response = await asyncio.gather(
+            self.features(), self.request(path), return_exceptions=True
+        )
+        if isinstance(features, BaseException):
+            raise features
+        if not supported(features):
+            return None
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    async def data_raw(self) -> dict[str, Any]:
+        """Return the data as received from the device.
+
+        This skips building the Data object, use this when only a few
+        values are needed.
+        """
+        return await self.request("api/v1/data")
+
     async def data(self) -> Data:
         """Return the data object."""
-        response = await self.request("api/v1/data")
-        return Data.from_dict(response)
+        response = await self.data_raw()
+        if not self._cache_data:
+            return Data.from_dict(response)
+
+        if self._last_data is None or response != self._last_data_response:
+            self._last_data = Data.from_dict(response)
+            self._last_data_response = response
+
+        return self._last_data
 
-    async def state(self) -> State | None:
-        """Return the state object."""
-        features = await self.features()
-        if not features.has_state:
+    async def state(self, assume_supported: bool = False) -> State | None:
+        """Return the state object.
+
+        Args:
+            assume_supported: Skip the feature check when the caller knows the
+                device supports this API.
+        """
+        if assume_supported:
+            response = await self.request("api/v1/state")
+        else:
+            response = await self._request_with_features(
+                "api/v1/state", lambda features: features.has_state
+            )
+        if response is None:
             return None
 
-        response = await self.request("api/v1/state")
         return State.from_dict(response)
 
     async def state_set(
@@ -90,25 +197,21 @@ class HomeWizardEnergy:
         power_on: bool | None = None,
         switch_lock: bool | None = None,
         brightness: int | None = None,
+        assume_supported: bool = False,
     ) -> bool:
         """Set state of device."""
-        state = {}
-        features = await self.features()
-        if not features.has_state:
+        if not assume_supported and not (await self.features()).has_state:
             raise UnsupportedError("Setting state is not supported with this device")
 
-        if power_on is not None:
-            state["power_on"] = power_on
-        if switch_lock is not None:
-            state["switch_lock"] = switch_lock
-        if brightness is not None:
-            state["brightness"] = brightness
+        state = _without_none(
+            power_on=power_on, switch_lock=switch_lock, brightness=brightness
+        )
 
         if not state:
             _LOGGER.error("At least one state update is required")
             return False
 
-        await self.request("api/v1/state", method=METH_PUT, data=state)
+        await self.request("api/v1/state", method="PUT", data=state)
         return True
 
     async def system(self) -> System:
@@ -119,32 +222,30 @@ class HomeWizardEnergy:
     async def system_set(
         self,
         cloud_enabled: bool | None = None,
+        assume_supported: bool = False,
     ) -> bool:
         """Set state of device."""
-        state = {}
-        features = await self.features()
-        if not features.has_system:
+        if not assume_supported and not (await self.features()).has_system:
             raise UnsupportedError("Setting system is not supported with this device")
 
-        if cloud_enabled is not None:
-            state["cloud_enabled"] = cloud_enabled
+        state = _without_none(cloud_enabled=cloud_enabled)
 
         if not state:
             _LOGGER.error("At least one state update is required")
             return False
 
-        await self.request("api/v1/system", method=METH_PUT, data=state)
+        await self.request("api/v1/system", method="PUT", data=state)
         return True
 
     async def identify(
         self,
+        assume_supported: bool = False,
     ) -> bool:
         """Send identify request."""
-        features = await self.features()
-        if not features.has_identify:
+        if not assume_supported and not (await self.features()).has_identify:
             raise UnsupportedError("Identify is not supported")
 
-        await self.request("api/v1/identify", method=METH_PUT)
+        await self.request("api/v1/identify", method="PUT")
         return True
 
     async def decryption(self) -> bool:
@@ -156,11 +257,10 @@ class HomeWizardEnergy:
         self,
         key: str | None = None,
         aad: str | None = None,
+        assume_supported: bool = False,
     ) -> bool:
         """Set state of device."""
-        data = {}
-        features = await self.features()
-        if not features.has_decryption:
+        if not assume_supported and not (await self.features()).has_decryption:
             raise UnsupportedError(
                 "Setting decryption is not supported with this device"
             )
@@ -168,13 +268,11 @@ class HomeWizardEnergy:
         if key is not None:
             if len(key) != 32:
                 raise ValueError("Key length should be 32 characters long")
-            if not all(c in string.hexdigits for c in key):
+            if not _is_hex(key):
                 raise ValueError(
                     "Key should only contain hexadecimal characters (0-9/a-f)"
                 )
 
-            data["key"] = key
-
         if aad is not None:
             if len(aad) != 34:
 
@@ -182,28 +280,27 @@ class HomeWizardEnergy:
                 if len(aad) == 32:
                     hint = "Hint: Try prefixing AAD with '30', e.g. '30<AAD>'"
                 raise ValueError("AAD length should be 34 characters long", hint)
-            if not all(c in string.hexdigits for c in aad):
+            if not _is_hex(aad):
                 raise ValueError(
                     "AAD should only contain hexadecimal characters (0-9/a-f)"
                 )
 
-            data["aad"] = aad
-
+        data = _without_none(key=key, aad=aad)
         if not data:
             _LOGGER.error("At least one decryption key is required")
             return False
 
-        await self.request("api/v1/decryption", method=METH_PUT, data=data)
+        await self.request("api/v1/decryption", method="PUT", data=data)
         return True
 
     async def decryption_reset(
         self,
         key: bool = False,
         aad: bool = False,
+        assume_supported: bool = False,
     ) -> bool:
         """Reset decryption keys of device."""
-        features = await self.features()
-        if not features.has_decryption:
+        if not assume_supported and not (await self.features()).has_decryption:
             raise UnsupportedError(
                 "Setting decryption is not supported with this device"
             )
@@ -213,39 +310,89 @@ class HomeWizardEnergy:
             "aad": aad,
         }
 
-        await self.request("api/v1/decryption", method=METH_DELETE, data=data)
+        await self.request("api/v1/decryption", method="DELETE", data=data)
         return True
 
     async def request(
-        self, path: str, method: str = METH_GET, data: object = None
+        self, path: str, method: str = "GET", data: object = None
     ) -> object | None:
-        """Make a request to the API."""
+        """Make a request to the API.
+
+        Concurrent GET requests for the same path share a single request.
+        Every caller gets its own copy of the response.
+        """
+        if method != "GET":
+            return await self._request(path, method, data)
+
+        task = self._inflight.get(path)
+        if task is not None:
+            return deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(self._request(path, method, data))
+        self._inflight[path] = task
+        task.add_done_callback(partial(self._request_done, path))
+
+        return await asyncio.shield(task)
+
+    def _request_done(self, path: str, task: asyncio.Future) -> None:
+        """Forget a finished GET request."""
+        self._inflight.pop(path, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when all callers were cancelled
+            task.exception()
+
+    async def _request(
+        self, path: str, method: str, data: object = None
+    ) -> object | None:
+        """Make a request to the API without coalescing."""
         if self._session is None:
-            self._session = ClientSession()
+            self._session = ClientSession(
+                connector=TCPConnector(limit_per_host=4, keepalive_timeout=75)
+            )
             self._close_session = True
 
-        url = f"http://{self.host}/{path}"
-        headers = {"Content-Type": "application/json"}
+        url = f"{self._base_url}/{path}"
 
         _LOGGER.debug("%s, %s, %s", method, url, data)
 
-        try:
-            async with async_timeout.timeout(self._request_timeout):
-                resp = await self._session.request(
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._request_timeout
+        timeout = self._client_timeout
+
+        for attempt in range(_REQUEST_ATTEMPTS):
+            try:
+                async with self._session.request(
                     method,
                     url,
                     json=data,
-                    headers=headers,
-                )
-                _LOGGER.debug("%s, %s", resp.status, await resp.text("utf-8"))
-        except asyncio.TimeoutError as exception:
-            raise RequestError(
-                "Timeout occurred while connecting to the HomeWizard Energy device"
-            ) from exception
-        except (ClientError, ClientResponseError) as exception:
-            raise RequestError(
-                "Error occurred while communicating with the HomeWizard Energy device"
-            ) from exception
+                    headers=_JSON_HEADERS,
+                    timeout=timeout,
+                ) as resp:
+                    body = await resp.read()
+                break
+            except asyncio.TimeoutError as exception:
+                raise RequestError(
+                    "Timeout occurred while connecting to the HomeWizard Energy device"
+                ) from exception
+            except ClientConnectionError as exception:
+                delay = _RETRY_DELAY * 2**attempt
+                remaining = deadline - loop.time() - delay
+                if attempt == _REQUEST_ATTEMPTS - 1 or remaining <= 0:
+                    raise RequestError(
+                        "Error occurred while communicating with the HomeWizard Energy device"
+                    ) from exception
+
+                _LOGGER.debug("Retrying %s, %s: %r", method, url, exception)
+                await asyncio.sleep(delay)
+                # Retries share the time left of the original timeout
+                timeout = ClientTimeout(total=remaining)
+            except ClientError as exception:
+                raise RequestError(
+                    "Error occurred while communicating with the HomeWizard Energy device"
+                ) from exception
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s, %s", resp.status, body[:512].decode("utf-8", "replace"))
 
         if resp.status == 403:
             # Known case: API disabled
@@ -257,11 +404,11 @@ class HomeWizardEnergy:
             # Something else went wrong
             raise RequestError(f"API request error ({resp.status})")
 
-        content_type = resp.headers.get("Content-Type", "")
-        if "application/json" in content_type:
-            return await resp.json()
+        if resp.content_type == "application/json":
+            # Some endpoints reply with an empty body
+            return json.loads(body) if body.strip() else None
 
-        return await resp.text()
+        return body.decode(resp.charset or "utf-8")
 
     async def close(self):
         """Close client session."""
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from typing import Any
 
+# Slots reduce the memory footprint of every model, supported since Python 3.10
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Device:
     """Represent Device config."""
 
@@ -37,7 +42,7 @@ class Device:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Data:
     """Represent Device config."""
 
@@ -101,6 +106,7 @@ class Data:
     external_devices: list[ExternalDevice]
 
     @staticmethod
+    @lru_cache(maxsize=64)
     def convert_timestamp_to_datetime(timestamp: str | None) -> datetime | None:
         """Convert SRM gas-timestamp to datetime object.
 
@@ -113,7 +119,19 @@ class Data:
         if timestamp is None:
             return None
 
-        return datetime.strptime(str(timestamp), "%y%m%d%H%M%S")
+        value = str(timestamp)
+        if len(value) != 12 or not value.isdigit():
+            # Let strptime raise a descriptive error
+            return datetime.strptime(value, "%y%m%d%H%M%S")
+
+        return datetime(
+            2000 + int(value[0:2]),
+            int(value[2:4]),
+            int(value[4:6]),
+            int(value[6:8]),
+            int(value[8:10]),
+            int(value[10:12]),
+        )
 
     @staticmethod
     def get_external_devices(external_devices) -> list[ExternalDevice] | None:
@@ -122,12 +140,7 @@ class Data:
         if external_devices is None:
             return None
 
-        devices: list[ExternalDevice] = []
-
-        for external in external_devices:
-            devices.append(ExternalDevice.from_dict(external))
-
-        return devices
+        return [ExternalDevice.from_dict(external) for external in external_devices]
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> Data:
@@ -190,7 +203,7 @@ class Data:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ExternalDevice:
     """Represents externally connected device."""
 
@@ -213,19 +226,10 @@ class ExternalDevice:
         def _missing_(cls, _):
             return cls.UNKNOWN
 
-        @staticmethod
-        def from_string(value: str) -> ExternalDevice.DeviceType:
+        @classmethod
+        def from_string(cls, value: str) -> ExternalDevice.DeviceType:
             """Convert string to enum."""
-            try:
-                return {
-                    "gas_meter": ExternalDevice.DeviceType.GAS_METER,
-                    "heat_meter": ExternalDevice.DeviceType.HEAT_METER,
-                    "warm_water_meter": ExternalDevice.DeviceType.WARM_WATER_METER,
-                    "water_meter": ExternalDevice.DeviceType.WATER_METER,
-                    "inlet_heat_meter": ExternalDevice.DeviceType.INLET_HEAT_METER,
-                }[value]
-            except (KeyError):
-                return ExternalDevice.DeviceType.UNKNOWN
+            return _EXTERNAL_DEVICE_TYPES.get(value, cls.UNKNOWN)
 
     unique_id: str
     meter_type: DeviceType
@@ -251,7 +255,16 @@ class ExternalDevice:
         )
 
 
-@dataclass
+_EXTERNAL_DEVICE_TYPES = {
+    "gas_meter": ExternalDevice.DeviceType.GAS_METER,
+    "heat_meter": ExternalDevice.DeviceType.HEAT_METER,
+    "warm_water_meter": ExternalDevice.DeviceType.WARM_WATER_METER,
+    "water_meter": ExternalDevice.DeviceType.WATER_METER,
+    "inlet_heat_meter": ExternalDevice.DeviceType.INLET_HEAT_METER,
+}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class State:
     """Represent current state."""
 
@@ -276,7 +289,7 @@ class State:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class System:
     """Represent current state."""
 
@@ -297,7 +310,7 @@ class System:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Decryption:
     """Represent decryption API."""
 
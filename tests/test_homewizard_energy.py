@@ -1,4 +1,7 @@
 """Test for HomeWizard Energy."""
+import asyncio
+import json
+import logging
 from unittest.mock import patch
 
 import aiohttp
@@ -32,6 +35,74 @@ async def test_request_returns_json(aresponses):
         await api.close()
 
 
+@pytest.mark.asyncio
+async def test_request_returns_none_for_empty_json(aresponses):
+    """Test empty JSON response is returned as None."""
+    aresponses.add(
+        "example.com",
+        "/api/v1/identify",
+        "PUT",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text="",
+        ),
+    )
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+        assert await api.request("api/v1/identify", method="PUT") is None
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_logs_response_body(aresponses, caplog):
+    """Test response body is logged and still parsed when debugging."""
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text='{"status": "ok"}',
+        ),
+    )
+    caplog.set_level(logging.DEBUG, logger="homewizard_energy")
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+        return_value = await api.request("api")
+        assert return_value["status"] == "ok"
+        assert '200, {"status": "ok"}' in caplog.text
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_coalesces_concurrent_gets(aresponses):
+    """Test concurrent GET requests for the same path share one request."""
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text='{"status": "ok"}',
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+        first, second = await asyncio.gather(api.request("api"), api.request("api"))
+        assert first == second == {"status": "ok"}
+        assert first is not second
+
+        # pylint: disable=protected-access
+        assert not api._inflight
+        aresponses.assert_plan_strictly_followed()
+        await api.close()
+
+
 @pytest.mark.asyncio
 async def test_request_internal_session(aresponses):
     """Test session is closed when created internally."""
@@ -48,7 +119,14 @@ async def test_request_internal_session(aresponses):
 
     api = HomeWizardEnergy("example.com")
     assert await api.request("api")
+
+    # pylint: disable=protected-access
+    connector = api._session.connector
+    assert connector.limit_per_host == 4
+    assert connector._keepalive_timeout == 75
+
     await api.close()
+    assert api._session.closed
 
 
 @pytest.mark.asyncio
@@ -72,6 +150,26 @@ async def test_request_returns_txt(aresponses):
         await api.close()
 
 
+@pytest.mark.asyncio
+async def test_request_returns_txt_with_charset(aresponses):
+    """Test raw text is decoded with the charset of the response."""
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "text/plain; charset=latin-1"},
+            body="Energy Socket café".encode("latin-1"),
+        ),
+    )
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+        return_value = await api.request("api")
+        assert return_value == "Energy Socket café"
+        await api.close()
+
+
 @pytest.mark.asyncio
 async def test_request_detects_403(aresponses):
     """Test request detects disabled API."""
@@ -124,9 +222,93 @@ async def test_request_detects_clienterror():
 
         with patch.object(
             session, "request", side_effect=aiohttp.ClientError
-        ), pytest.raises(RequestError):
+        ) as request, pytest.raises(RequestError):
             await api.request("api")
 
+        assert request.call_count == 1
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_detects_timeout():
+    """Test timeout is converted to RequestError."""
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session, timeout=5)
+
+        with patch.object(
+            session, "request", side_effect=asyncio.TimeoutError
+        ) as request, pytest.raises(RequestError):
+            await api.request("api")
+
+        assert request.call_count == 1
+
+        assert request.call_args.kwargs["timeout"].total == 5
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_retries_transient_error(aresponses):
+    """Test request is retried after a transient error."""
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text='{"status": "ok"}',
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+        response = session.request("GET", "http://example.com/api")
+
+        with patch.object(
+            session,
+            "request",
+            side_effect=[aiohttp.ServerDisconnectedError(), response],
+        ) as request:
+            return_value = await api.request("api")
+
+        assert return_value["status"] == "ok"
+        assert request.call_count == 2
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_retries_connection_error():
+    """Test connection errors are retried a limited number of times."""
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        with patch.object(
+            session, "request", side_effect=aiohttp.ServerDisconnectedError
+        ) as request, pytest.raises(RequestError):
+            await api.request("api")
+
+        assert request.call_count == 3
+        assert request.call_args.kwargs["timeout"].total < 10
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_request_retries_within_timeout():
+    """Test connection errors are not retried when the timeout has passed."""
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session, timeout=0.05)
+
+        with patch.object(
+            session, "request", side_effect=aiohttp.ServerDisconnectedError
+        ) as request, pytest.raises(RequestError):
+            await api.request("api")
+
+        assert request.call_count == 1
+
         await api.close()
 
 
@@ -182,6 +364,37 @@ async def test_get_device_object_detects_invalid_api(aresponses):
         await api.close()
 
 
+@pytest.mark.asyncio
+async def test_features_not_cached_for_invalid_api(aresponses):
+    """Test features are not cached when the API version is unsupported."""
+
+    for _ in range(2):
+        aresponses.add(
+            "example.com",
+            "/api",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures("device_invalid_api.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        with pytest.raises(UnsupportedError):
+            await api.features()
+
+        with pytest.raises(UnsupportedError):
+            await api.features()
+
+        # pylint: disable=protected-access
+        assert api._features is None
+
+        await api.close()
+
+
 @pytest.mark.asyncio
 async def test_get_data_object(aresponses):
     """Test fetches data object and device object when unknown."""
@@ -247,6 +460,33 @@ async def test_get_data_object_with_known_device(aresponses):
         await api.close()
 
 
+@pytest.mark.asyncio
+async def test_get_data_raw(aresponses):
+    """Test fetches data as received from the device."""
+
+    aresponses.add(
+        "example.com",
+        "/api/v1/data",
+        "GET",
+        aresponses.Response(
+            text=load_fixtures("data_p1.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        # pylint: disable=protected-access
+        api._features = Features("HWE-P1", "4.00")
+        data = await api.data_raw()
+
+        assert data == json.loads(load_fixtures("data_p1.json"))
+
+        await api.close()
+
+
 @pytest.mark.asyncio
 async def test_get_state_object(aresponses):
     """Test fetches state object and device object when unknown."""
@@ -625,6 +865,9 @@ async def test_decryption_set(aresponses):
         with pytest.raises(ValueError):
             await api.decryption_set(aad="30FAILccddeeff00112233445566778899")
 
+        with pytest.raises(ValueError):
+            await api.decryption_set(key="aabb ccddeeff0011223344556677889")
+
         response = await api.decryption_set(
             key="aabbccddeeff00112233445566778899",
             aad="30aabbccddeeff00112233445566778899",
@@ -659,3 +902,240 @@ async def test_decryption_reset(aresponses):
         assert response
 
         await api.close()
+
+
+@pytest.mark.asyncio
+async def test_features_are_cached():
+    """Test device information is only fetched once for feature detection."""
+
+    responses = {
+        "api": json.loads(load_fixtures("device_energysocket.json")),
+        "api/v1/state": json.loads(load_fixtures("state.json")),
+    }
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        with patch.object(
+            api, "request", side_effect=lambda path, *_: responses[path]
+        ) as request:
+            for _ in range(3):
+                state = await api.state()
+                assert state
+                assert not state.power_on
+
+            assert request.call_count == 4
+            assert [call.args[0] for call in request.call_args_list].count("api") == 1
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_get_state_object_unknown_device_not_supported(aresponses):
+    """Test state returns None when unsupported and device was unknown."""
+
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            text=load_fixtures("device.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    aresponses.add(
+        "example.com",
+        "/api/v1/state",
+        "GET",
+        aresponses.Response(status=404),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        state = await api.state()
+        assert state is None
+
+        # pylint: disable=protected-access
+        assert api._features.device_type == "HWE-P1"
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_features_fetched_once_when_concurrent(aresponses):
+    """Test concurrent callers share a single device request."""
+
+    aresponses.add(
+        "example.com",
+        "/api",
+        "GET",
+        aresponses.Response(
+            text=load_fixtures("device_energysocket.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    aresponses.add(
+        "example.com",
+        "/api/v1/state",
+        "GET",
+        aresponses.Response(
+            text=load_fixtures("state.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        first, second = await asyncio.gather(api.state(), api.state())
+        assert first == second
+        assert not first.power_on
+
+        aresponses.assert_plan_strictly_followed()
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_get_data_object_cached(aresponses):
+    """Test data object is reused when response is unchanged."""
+
+    for fixture in ("data_p1.json", "data_p1.json", "data_p1_full.json"):
+        aresponses.add(
+            "example.com",
+            "/api/v1/data",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures(fixture),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session, cache_data=True)
+
+        # pylint: disable=protected-access
+        api._features = Features("HWE-P1", "4.00")
+
+        first = await api.data()
+        second = await api.data()
+        assert first is second
+
+        third = await api.data()
+        assert third is not first
+        assert len(third.external_devices) == 5
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_get_data_object_not_cached_by_default(aresponses):
+    """Test data object is rebuilt for every call by default."""
+
+    for _ in range(2):
+        aresponses.add(
+            "example.com",
+            "/api/v1/data",
+            "GET",
+            aresponses.Response(
+                text=load_fixtures("data_p1.json"),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        # pylint: disable=protected-access
+        api._features = Features("HWE-P1", "4.00")
+
+        first = await api.data()
+        second = await api.data()
+        assert first is not second
+        assert first == second
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_assume_supported_skips_feature_check(aresponses):
+    """Test device information is not requested when support is assumed."""
+
+    aresponses.add(
+        "example.com",
+        "/api/v1/state",
+        "GET",
+        aresponses.Response(
+            text=load_fixtures("state.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    aresponses.add(
+        "example.com",
+        "/api/v1/identify",
+        "PUT",
+        aresponses.Response(
+            text=load_fixtures("identify.json"),
+            status=200,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        ),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        state = await api.state(assume_supported=True)
+        assert state
+        assert not state.power_on
+
+        assert await api.identify(assume_supported=True)
+
+        # pylint: disable=protected-access
+        assert api._features is None
+        aresponses.assert_plan_strictly_followed()
+
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_ungated_endpoints_skip_feature_check(aresponses):
+    """Test data and system do not request device information."""
+
+    for path, fixture in (
+        ("/api/v1/data", "data_p1.json"),
+        ("/api/v1/data", "data_p1.json"),
+        ("/api/v1/system", "system_cloud_enabled.json"),
+    ):
+        aresponses.add(
+            "example.com",
+            path,
+            "GET",
+            aresponses.Response(
+                text=load_fixtures(fixture),
+                status=200,
+                headers={"Content-Type": "application/json; charset=utf-8"},
+            ),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        api = HomeWizardEnergy("example.com", clientsession=session)
+
+        assert await api.data_raw()
+        assert await api.data()
+        assert await api.system()
+
+        # pylint: disable=protected-access
+        assert api._features is None
+        aresponses.assert_plan_strictly_followed()
+
+        await api.close()
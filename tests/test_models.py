@@ -3,6 +3,8 @@
 import json
 from datetime import datetime
 
+import pytest
+
 from homewizard_energy import Data, Decryption, Device, ExternalDevice, State, System
 
 from . import load_fixtures
@@ -188,6 +190,39 @@ def test_data_p1_full():
     assert device.timestamp == datetime(2021, 6, 6, 14, 0, 10)
 
 
+def test_convert_timestamp_to_datetime():
+    """Test SMR timestamps are converted to datetime objects."""
+    assert Data.convert_timestamp_to_datetime(None) is None
+    assert Data.convert_timestamp_to_datetime(230101080010) == datetime(
+        2023, 1, 1, 8, 0, 10
+    )
+    assert Data.convert_timestamp_to_datetime("211231235959") == datetime(
+        2021, 12, 31, 23, 59, 59
+    )
+
+    # Years are always in the 2000s, unlike strptime("%y") for 69-99
+    assert Data.convert_timestamp_to_datetime("991231235959") == datetime(
+        2099, 12, 31, 23, 59, 59
+    )
+
+    with pytest.raises(ValueError):
+        Data.convert_timestamp_to_datetime("21123123595x")
+
+    with pytest.raises(ValueError):
+        Data.convert_timestamp_to_datetime("211331235959")
+
+
+def test_external_device_unknown_type():
+    """Test unknown external device types are mapped to UNKNOWN."""
+    assert (
+        ExternalDevice.DeviceType.from_string("heat_pump")
+        == ExternalDevice.DeviceType.UNKNOWN
+    )
+    assert ExternalDevice.DeviceType.from_string(None) == (
+        ExternalDevice.DeviceType.UNKNOWN
+    )
+
+
 def test_data_watermeter():
     """TODO."""
     data: Data = Data.from_dict(json.loads(load_fixtures("data_watermeter.json")))